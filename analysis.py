@@ -0,0 +1,144 @@
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from block import BLOCK_TYPES, rotate_block
+from hashing import BoardCache, canonical_board, canonical_move, canonical_position, uncanonical_move
+from moves import has_legal_move, legal_moves
+
+# Every piece that can be dealt: each block type in each of its 4 orientations
+ALL_SHAPES = tuple(
+  tuple(rotate_block(positions, times))
+  for positions in BLOCK_TYPES.values()
+  for times in range(4)
+)
+
+class Cancelled(Exception):
+  """Raised inside an analysis when its job has been superseded."""
+
+class AnalysisJob(NamedTuple):
+  """Immutable input for one analysis run."""
+  version: int             # Board version the job was submitted for
+  board: int               # Bitboard with pending clears already applied
+  hand: tuple              # Positions of each available block
+
+class AnalysisResult(NamedTuple):
+  """Result of analysing one board and hand."""
+  version: int
+  legal_moves: int         # Number of (slot, row, col) placements that fit
+  best_move: Optional[tuple]  # (slot, row, col) clearing the most lines, or None
+  best_clears: int         # Lines cleared by best_move
+  dead_risk: float         # Fraction of all pieces that fit nowhere on the board
+
+def analyze(job, check=lambda: None, cache=None):
+  """Analyse a job, calling check() regularly so the caller can cancel it.
+  
+  Results are remembered in cache (a BoardCache), if given, under the
+  position's canonical key, so rotations of a position are only analysed once.
+  """
+  key, times = canonical_position(job.board, job.hand)
+  found = cache.get(key) if cache is not None else None
+  if found is None:
+    legal, best_move, best_clears = _analyze_moves(job, check)
+    if best_move:
+      best_move = canonical_move(job.hand, times, *best_move)
+    found = (legal, best_move, best_clears)
+    if cache is not None:
+      cache.put(key, found)
+  legal, best_move, best_clears = found
+  if best_move:
+    best_move = uncanonical_move(job.hand, times, *best_move)
+
+  # The set of every piece is closed under rotation, so this only depends on the board
+  board_key, _ = canonical_board(job.board)
+  dead_risk = cache.get(board_key) if cache is not None else None
+  if dead_risk is None:
+    dead_risk = _dead_risk(job.board, check)
+    if cache is not None:
+      cache.put(board_key, dead_risk)
+
+  return AnalysisResult(job.version, legal, best_move, best_clears, dead_risk)
+
+def _analyze_moves(job, check):
+  """Count the legal moves and find the best one, as (count, (slot, row, col), clears)."""
+  legal = 0
+  best_move = None
+  best_key = None
+  for move in legal_moves(job.board, job.hand):
+    check()
+    legal += 1
+    # Prefer the most clears, then the emptiest resulting board
+    key = (move.clears, -bin(move.board).count("1"))
+    if best_key is None or key > best_key:
+      best_key = key
+      best_move = (move.slot, move.row, move.col)
+  return legal, best_move, best_key[0] if best_key else 0
+
+def _dead_risk(board, check):
+  """Get the fraction of all pieces that fit nowhere on the board."""
+  dead_shapes = 0
+  for positions in ALL_SHAPES:
+    check()
+    if not has_legal_move(board, [positions]):
+      dead_shapes += 1
+  return dead_shapes / len(ALL_SHAPES)
+
+class AnalysisService:
+  """Runs analyses on a worker thread so the game loop never waits for them.
+
+  Only the newest job matters: submitting a job cancels the one in flight,
+  and poll() only ever returns the result for the newest job.
+  """
+  def __init__(self):
+    self._condition = threading.Condition()
+    self._job = None
+    self._result = None
+    self._running = True
+    # Only the worker thread touches the cache
+    self._cache = BoardCache()
+    self._thread = threading.Thread(target=self._work, name="analysis", daemon=True)
+    self._thread.start()
+
+  def submit(self, version, board, hand):
+    """Queue a board and hand for analysis, superseding any earlier job."""
+    with self._condition:
+      self._job = AnalysisJob(version, board, tuple(tuple(positions) for positions in hand))
+      self._result = None
+      self._condition.notify()
+
+  def poll(self):
+    """Get the result of the newest job, or None if it is not ready yet."""
+    with self._condition:
+      return self._result
+
+  def stop(self):
+    """Stop the worker thread."""
+    with self._condition:
+      self._running = False
+      self._job = None
+      self._condition.notify()
+    self._thread.join()
+
+  def _work(self):
+    """Worker loop: analyse the newest job, dropping it if it gets superseded."""
+    while True:
+      with self._condition:
+        while self._running and (self._job is None or self._result is not None):
+          self._condition.wait()
+        if not self._running:
+          return
+        job = self._job
+
+      def check():
+        if self._job is not job:
+          raise Cancelled
+        # Give the game loop a chance at the interpreter between steps
+        time.sleep(0)
+
+      try:
+        result = analyze(job, check, self._cache)
+      except Cancelled:
+        continue
+      with self._condition:
+        if self._job is job:
+          self._result = result
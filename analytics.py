@@ -0,0 +1,110 @@
+"""Summarise game logs written by GameLog.
+
+Reads the chunk files with memory-mapped, batch-at-a-time passes, so the
+logs never have to fit in memory:
+
+    python analytics.py logs
+"""
+import argparse
+import os
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+from block import BLOCK_TYPES
+from constants import ANALYTICS_BATCH_SIZE
+from gamelog import NO_BLOCK, chunk_paths
+
+BLOCK_TYPE_NAMES = list(BLOCK_TYPES)
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+def stream(directory, kind, batch_size=ANALYTICS_BATCH_SIZE):
+  """Yield the records of every chunk of one kind, a batch at a time."""
+  for path in chunk_paths(directory, kind):
+    records = np.load(path, mmap_mode="r")
+    for start in range(0, len(records), batch_size):
+      yield records[start:start + batch_size]
+
+def add_counts(totals, values):
+  """Add a batch of small non-negative integers to a running histogram."""
+  counts = np.bincount(values)
+  if counts.size > totals.size:
+    totals = np.pad(totals, (0, counts.size - totals.size))
+  totals[:counts.size] += counts
+  return totals
+
+def histogram_percentiles(counts, percentiles):
+  """Get exact percentiles (nearest rank) of the values counted in a histogram."""
+  cumulative = np.cumsum(counts)
+  ranks = np.ceil(np.array(percentiles) / 100 * cumulative[-1]).clip(min=1)
+  return np.searchsorted(cumulative, ranks)
+
+def summarise_games(directory):
+  """Print score, death and multiplier distributions over all games."""
+  scores = np.zeros(0, dtype=np.int64)
+  max_multipliers = np.zeros(0, dtype=np.int64)
+  death_types = np.zeros(len(BLOCK_TYPE_NAMES), dtype=np.int64)
+  for batch in stream(directory, "games"):
+    scores = add_counts(scores, batch["score"].clip(min=0))
+    max_multipliers = add_counts(max_multipliers, batch["max_multiplier"])
+    hands = batch["death_hand"].ravel()
+    death_types += np.bincount(hands[hands != NO_BLOCK], minlength=len(BLOCK_TYPE_NAMES))
+
+  games = int(scores.sum())
+  print(f"Games: {games}")
+  if not games:
+    return
+  mean = (np.arange(scores.size) * scores).sum() / games
+  print(f"Mean score: {mean:.1f}")
+  for percentile, score in zip(PERCENTILES, histogram_percentiles(scores, PERCENTILES)):
+    print(f"  p{percentile}: {score}")
+
+  print("Block types left in the hand at game over:")
+  for index in np.argsort(-death_types):
+    print(f"  {BLOCK_TYPE_NAMES[index]:<12} {death_types[index] / games:6.1%} of games")
+
+  print("Highest multiplier reached:")
+  for multiplier in np.nonzero(max_multipliers)[0]:
+    print(f"  x{multiplier:<4} {max_multipliers[multiplier] / games:6.1%} of games")
+
+def summarise_moves(directory):
+  """Print clear and multiplier distributions over all logged moves."""
+  lines_cleared = np.zeros(0, dtype=np.int64)
+  multipliers = np.zeros(0, dtype=np.int64)
+  block_moves = np.zeros(len(BLOCK_TYPE_NAMES), dtype=np.int64)
+  block_clears = np.zeros(len(BLOCK_TYPE_NAMES), dtype=np.int64)
+  for batch in stream(directory, "moves"):
+    lines_cleared = add_counts(lines_cleared, batch["lines_cleared"])
+    multipliers = add_counts(multipliers, batch["multiplier"])
+    block_moves += np.bincount(batch["block_type"], minlength=len(BLOCK_TYPE_NAMES))
+    block_clears += np.bincount(batch["block_type"], weights=batch["lines_cleared"] > 0,
+                                minlength=len(BLOCK_TYPE_NAMES)).astype(np.int64)
+
+  moves = int(lines_cleared.sum())
+  print(f"Moves: {moves}")
+  if not moves:
+    return
+  print("Lines cleared per move:")
+  for count in np.nonzero(lines_cleared)[0]:
+    print(f"  {count:<4} {lines_cleared[count] / moves:6.1%}")
+
+  print("Multiplier after each move:")
+  for multiplier in np.nonzero(multipliers)[0]:
+    print(f"  x{multiplier:<4} {multipliers[multiplier] / moves:6.1%}")
+
+  print("Moves that clear a line, by block type:")
+  for index, name in enumerate(BLOCK_TYPE_NAMES):
+    if block_moves[index]:
+      print(f"  {name:<12} {block_clears[index] / block_moves[index]:6.1%} of {block_moves[index]} moves")
+
+def main():
+  parser = argparse.ArgumentParser(description="Summarise Block Blast game logs.")
+  parser.add_argument("log_dir", help="directory the game logs were written to")
+  args = parser.parse_args()
+  summarise_games(args.log_dir)
+  print()
+  summarise_moves(args.log_dir)
+
+if __name__ == "__main__":
+  main()
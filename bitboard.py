@@ -0,0 +1,88 @@
+from functools import lru_cache
+
+import numpy as np
+
+from constants import GRID_SIZE
+
+# Bitboards pack the grid into a single int: cell (row, col) is bit row * GRID_SIZE + col
+NUM_CELLS = GRID_SIZE * GRID_SIZE
+FULL_BOARD = (1 << NUM_CELLS) - 1
+_BIT_SHIFTS = np.arange(NUM_CELLS, dtype=np.uint64)
+
+def cells_to_bits(cells):
+  """Pack a GRID_SIZE x GRID_SIZE boolean array into a bitboard."""
+  bits = np.asarray(cells, dtype=np.uint64).reshape(NUM_CELLS) << _BIT_SHIFTS
+  return int(np.bitwise_or.reduce(bits))
+
+def bits_to_cells(bits):
+  """Unpack a bitboard (or an array of them) into GRID_SIZE x GRID_SIZE boolean arrays."""
+  bits = np.asarray(bits, dtype=np.uint64)
+  cells = (bits[..., None] >> _BIT_SHIFTS) & np.uint64(1)
+  return cells.astype(bool).reshape(bits.shape + (GRID_SIZE, GRID_SIZE))
+
+# Masks of each full row and column
+ROW_MASKS = [((1 << GRID_SIZE) - 1) << (row * GRID_SIZE) for row in range(GRID_SIZE)]
+COL_MASKS = [sum(1 << (row * GRID_SIZE + col) for row in range(GRID_SIZE)) for col in range(GRID_SIZE)]
+
+@lru_cache(maxsize=None)
+def anchor_masks(positions):
+  """Get (row, col, mask) for every anchor where the shape fits inside the grid.
+
+  positions is a tuple of (row, col) cells, as in Block.positions.
+  """
+  height = max(row for row, _ in positions) + 1
+  width = max(col for _, col in positions) + 1
+  shape = sum(1 << (row * GRID_SIZE + col) for row, col in positions)
+  return tuple(
+    (row, col, shape << (row * GRID_SIZE + col))
+    for row in range(GRID_SIZE - height + 1)
+    for col in range(GRID_SIZE - width + 1)
+  )
+
+def line_indices(bits):
+  """Get the indices of the full rows and of the full columns."""
+  rows = [row for row, mask in enumerate(ROW_MASKS) if bits & mask == mask]
+  cols = [col for col, mask in enumerate(COL_MASKS) if bits & mask == mask]
+  return rows, cols
+
+# Bit 0 of every row, i.e. the first cell of each row
+_ROW_STARTS = sum(1 << (row * GRID_SIZE) for row in range(GRID_SIZE))
+
+def _fold_shifts(size):
+  """Get shifts that AND each run of size consecutive cells into its first cell.
+
+  Each shift at most doubles the run already folded, e.g. 1, 2, 4 for 8 cells.
+  """
+  shifts = []
+  span = 1
+  while span < size:
+    shifts.append(min(span, size - span))
+    span += shifts[-1]
+  return shifts
+
+_FOLD_SHIFTS = _fold_shifts(GRID_SIZE)
+# The same folds a whole row at a time, for ANDing down columns
+_ROW_FOLD_SHIFTS = [shift * GRID_SIZE for shift in _FOLD_SHIFTS]
+
+def full_lines(bits):
+  """Get the mask of all cells in full rows and columns, and the number of full lines."""
+  # AND each row's cells together into its first cell
+  rows = bits
+  for shift in _FOLD_SHIFTS:
+    rows &= rows >> shift
+  rows &= _ROW_STARTS
+  # AND all rows together into the first row: a column survives only if it is full
+  cols = bits
+  for shift in _ROW_FOLD_SHIFTS:
+    cols &= cols >> shift
+  cols &= (1 << GRID_SIZE) - 1
+  if not (rows or cols):
+    return 0, 0
+  # Spread each flag back out over its whole row or column
+  mask = rows * ((1 << GRID_SIZE) - 1) | cols * _ROW_STARTS
+  return mask, bin(rows).count("1") + bin(cols).count("1")
+
+def clear_lines(bits):
+  """Clear all full rows and columns, returning the new bitboard and the lines cleared."""
+  mask, count = full_lines(bits)
+  return bits & ~mask, count
@@ -1,8 +1,9 @@
 import pygame
 import random
 import os
+from collections import OrderedDict
 
-from constants import BLACK, CELL_SIZE, GRID_SIZE
+from constants import BLACK, CELL_SIZE, GRID_SIZE, TILE_CACHE_SIZE
 
 # Map color tuples to image filenames
 COLOR_TO_IMAGE = {
@@ -31,29 +32,104 @@ BLOCK_TYPES = {
   "T_shape_2x3": [(0, 1), (1, 0), (1, 1), (1, 2)]
 }
 
-# Load tile images
+# Tile images for the current cell size, keyed by color
 TILE_IMAGES = {}
-def load_tile_images():
-    """Load all tile images from the tiles directory."""
+# Semi-transparent versions of TILE_IMAGES for ghost previews
+GHOST_IMAGES = {}
+# Unscaled tile atlas and the atlas column of each color
+_SOURCE_ATLAS = None
+_ATLAS_COLUMNS = {}
+# Scaled (tiles, ghosts) pairs keyed by cell size, least recently used first
+_TILE_CACHE = OrderedDict()
+
+def _load_source_atlas():
+    """Load the tile PNGs once into a single unscaled atlas surface."""
+    global _SOURCE_ATLAS
     tiles_dir = "tiles"
     if not os.path.exists(tiles_dir):
         print(f"Warning: Tiles directory '{tiles_dir}' not found")
         return False
-        
-    for color, filename in COLOR_TO_IMAGE.items():
+    
+    images = {}
+    for filename in set(COLOR_TO_IMAGE.values()):
         image_path = os.path.join(tiles_dir, filename)
         if os.path.exists(image_path):
             try:
-                TILE_IMAGES[color] = pygame.image.load(image_path).convert_alpha()
-                # Scale the image to match the cell size
-                TILE_IMAGES[color] = pygame.transform.scale(TILE_IMAGES[color], (CELL_SIZE, CELL_SIZE))
+                images[filename] = pygame.image.load(image_path).convert_alpha()
             except Exception as e:
                 print(f"Error loading image {image_path}: {e}")
         else:
             print(f"Warning: Image file {image_path} not found")
+    if not images:
+        return False
+    
+    # Lay the tiles out side by side, one column per image file
+    size = max(max(image.get_size()) for image in images.values())
+    filenames = sorted(images)
+    _SOURCE_ATLAS = pygame.Surface((size * len(filenames), size), pygame.SRCALPHA)
+    for column, filename in enumerate(filenames):
+        _SOURCE_ATLAS.blit(pygame.transform.scale(images[filename], (size, size)), (column * size, 0))
+    for color, filename in COLOR_TO_IMAGE.items():
+        if filename in images:
+            _ATLAS_COLUMNS[color] = filenames.index(filename)
+    return True
+
+def _build_tile_set(cell_size):
+    """Scale the source atlas to the cell size and cut it into tiles."""
+    columns = _SOURCE_ATLAS.get_width() // _SOURCE_ATLAS.get_height()
+    atlas = pygame.transform.scale(_SOURCE_ATLAS, (columns * cell_size, cell_size))
+    tiles = {}
+    ghosts = {}
+    for color, column in _ATLAS_COLUMNS.items():
+        tiles[color] = atlas.subsurface((column * cell_size, 0, cell_size, cell_size))
+        ghost = tiles[color].copy()
+        ghost.set_alpha(100)
+        ghosts[color] = ghost
+    return tiles, ghosts
+
+def load_tile_images(cell_size=CELL_SIZE):
+    """Load all tile images from the tiles directory, scaled to the cell size.
     
+    Scaled tile sets are cached per cell size, so switching back to a recent
+    size (e.g. while the window is being resized) does not rescale anything.
+    """
+    if _SOURCE_ATLAS is None and not _load_source_atlas():
+        return False
+    
+    if cell_size in _TILE_CACHE:
+        _TILE_CACHE.move_to_end(cell_size)
+    else:
+        _TILE_CACHE[cell_size] = _build_tile_set(cell_size)
+        if len(_TILE_CACHE) > TILE_CACHE_SIZE:
+            _TILE_CACHE.popitem(last=False)
+    
+    tiles, ghosts = _TILE_CACHE[cell_size]
+    TILE_IMAGES.clear()
+    TILE_IMAGES.update(tiles)
+    GHOST_IMAGES.clear()
+    GHOST_IMAGES.update(ghosts)
     return len(TILE_IMAGES) > 0
 
+def deal_hand(seed, deal_index):
+    """Deal three blocks of different types, as (block type, color) pairs.
+    
+    The same seed and deal index always deal the same hand.
+    """
+    rng = random.Random(f"{seed}:{deal_index}")
+    block_types = list(BLOCK_TYPES.keys())
+    valid_colors = [color for color in COLOR_TO_IMAGE.keys() if color is not None]
+    hand = []
+    used_types = set()
+    for _ in range(3):
+        # Choose a random block type that hasn't been used yet
+        available_types = [t for t in block_types if t not in used_types]
+        if not available_types:
+            available_types = block_types  # If all types have been used, use any type
+        block_type = rng.choice(available_types)
+        used_types.add(block_type)
+        hand.append((block_type, rng.choice(valid_colors)))
+    return hand
+
 def rotate_block(block, times=1):
     """Rotate the block the given number of times."""
     result = block.copy()  # Start with a copy of the original block
@@ -74,6 +150,8 @@ class Block:
     # Randomize the block's color, excluding None (empty tile)
     valid_colors = [color for color in COLOR_TO_IMAGE.keys() if color is not None]
     self.color = random.choice(valid_colors)
+    # (Pixel) Size of each cell, follows the window layout
+    self.cell_size = CELL_SIZE
     # Screen position
     self.x = 0
     self.y = 0
@@ -90,6 +168,10 @@ class Block:
     if not TILE_IMAGES:
         load_tile_images()
     
+  def set_cell_size(self, cell_size):
+    """Set the pixel size of each cell of the block."""
+    self.cell_size = cell_size
+    
   def set_position(self, x, y):
     """Set the block's position on the screen."""
     self.x = x
@@ -102,11 +184,11 @@ class Block:
     local_y = y - self.y
     
     # Check if the point is within the block's bounding box
-    if (0 <= local_x < self.width * CELL_SIZE and 
-        0 <= local_y < self.height * CELL_SIZE):
+    if (0 <= local_x < self.width * self.cell_size and 
+        0 <= local_y < self.height * self.cell_size):
       # Convert to grid coordinates
-      grid_x = local_x // CELL_SIZE
-      grid_y = local_y // CELL_SIZE
+      grid_x = local_x // self.cell_size
+      grid_y = local_y // self.cell_size
       
       # Check if the grid position is part of the block
       return (grid_y, grid_x) in self.positions
@@ -133,8 +215,8 @@ class Block:
     """Get the grid positions that this block occupies."""
     grid_positions = []
     for row, col in self.positions:
-      grid_x = int((self.x + col * CELL_SIZE - grid_offset_x) // CELL_SIZE)
-      grid_y = int((self.y + row * CELL_SIZE - grid_offset_y) // CELL_SIZE)
+      grid_x = int((self.x + col * self.cell_size - grid_offset_x) // self.cell_size)
+      grid_y = int((self.y + row * self.cell_size - grid_offset_y) // self.cell_size)
       # Only include positions that are within the grid boundaries
       if 0 <= grid_y < GRID_SIZE and 0 <= grid_x < GRID_SIZE:
         grid_positions.append((grid_y, grid_x))
@@ -142,8 +224,8 @@ class Block:
       
   def snap_to_grid(self, grid_offset_x, grid_offset_y):
     """Snap the block to the nearest grid position."""
-    grid_x = round((self.x - grid_offset_x) / CELL_SIZE) * CELL_SIZE + grid_offset_x
-    grid_y = round((self.y - grid_offset_y) / CELL_SIZE) * CELL_SIZE + grid_offset_y
+    grid_x = round((self.x - grid_offset_x) / self.cell_size) * self.cell_size + grid_offset_x
+    grid_y = round((self.y - grid_offset_y) / self.cell_size) * self.cell_size + grid_offset_y
     self.x = grid_x
     self.y = grid_y
       
@@ -151,28 +233,21 @@ class Block:
     """Draw the block on the screen."""
     for row, col in self.positions:
       rect = pygame.Rect(
-          self.x + col * CELL_SIZE,
-          self.y + row * CELL_SIZE,
-          CELL_SIZE,
-          CELL_SIZE
+          self.x + col * self.cell_size,
+          self.y + row * self.cell_size,
+          self.cell_size,
+          self.cell_size
       )
       
       if ghost:
-        # Draw as a ghost using the tile image with transparency
-        if self.color in TILE_IMAGES:
-            # Create a surface for the ghost tile
-            ghost_surface = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-            # Blit the tile image onto the ghost surface
-            ghost_surface.blit(TILE_IMAGES[self.color], (0, 0))
-            # Set the alpha for the entire surface
-            ghost_surface.set_alpha(100)
-            # Draw the ghost tile
-            screen.blit(ghost_surface, rect)
+        # Draw as a ghost using the pre-faded tile image
+        if self.color in GHOST_IMAGES:
+            screen.blit(GHOST_IMAGES[self.color], rect)
         else:
             # Fallback to drawing a semi-transparent rectangle if no tile image
             color_with_alpha = (*self.color, 100)
-            s = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-            pygame.draw.rect(s, color_with_alpha, (0, 0, CELL_SIZE, CELL_SIZE))
+            s = pygame.Surface((self.cell_size, self.cell_size), pygame.SRCALPHA)
+            pygame.draw.rect(s, color_with_alpha, (0, 0, self.cell_size, self.cell_size))
             screen.blit(s, rect)
       else:
         # Draw using the tile image if available, otherwise fall back to colored rectangle
@@ -20,4 +20,18 @@ GRID_OFFSET_Y = 100
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 GRAY = (200, 200, 200)
-DARK_GRAY = (100, 100, 100)
\ No newline at end of file
+DARK_GRAY = (100, 100, 100)
+# (Pixel) Smallest cell size the window layout will shrink to
+MIN_CELL_SIZE = 20
+# Number of scaled tile sets kept in memory (one per cell size)
+TILE_CACHE_SIZE = 4
+# Seconds that full lines animate for before they are cleared
+CLEAR_ANIMATION_TIME = 1.0
+# Number of moves that can be undone
+HISTORY_LIMIT = 10000
+# Number of records per game log chunk file
+LOG_CHUNK_SIZE = 1 << 16
+# Number of log records analytics reads from a chunk at a time
+ANALYTICS_BATCH_SIZE = 1 << 20
+# Number of positions each analysis cache remembers
+ANALYSIS_CACHE_SIZE = 1 << 16
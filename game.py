@@ -4,28 +4,42 @@ import pygame
 import numpy as np
 import math
 import os
+import time
 
-from block import BLOCK_TYPES, Block
+from functools import lru_cache
+
+from analysis import AnalysisService
+from bitboard import bits_to_cells, cells_to_bits, clear_lines, full_lines, line_indices
+from block import BLOCK_TYPES, Block, deal_hand, load_tile_images
+from gamelog import NO_BLOCK
 from grid import Grid
-from constants import BLACK, CELL_SIZE, GRAY, GRID_HEIGHT, GRID_OFFSET_X, GRID_OFFSET_Y, GRID_SIZE, GRID_WIDTH, WINDOW_HEIGHT, WINDOW_WIDTH
+from heatmap import board_heatmap
+from history import History, Snapshot, decode_colors, decode_hand, encode_colors, encode_hand
+from layout import Layout
+from rules import STREAK_MOVES, clear_points, next_multiplier
+from constants import BLACK, GRAY, GRID_SIZE, WINDOW_HEIGHT, WINDOW_WIDTH
+
+
+@lru_cache(maxsize=16)
+def load_font(name, size):
+  """Load a font, reusing it if it was already loaded at this size."""
+  if name is None:
+    return pygame.font.SysFont(None, size)
+  return pygame.font.Font(name, size)
 
 
 class Game:
-  def __init__(self):
-    self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+  def __init__(self, game_log=None, seed=None, now=time.time):
+    # Keep the current window size when restarting
+    surface = pygame.display.get_surface()
+    window_size = surface.get_size() if surface else (WINDOW_WIDTH, WINDOW_HEIGHT)
+    self.screen = pygame.display.set_mode(window_size, pygame.RESIZABLE)
     pygame.display.set_caption("Block Blast")
     self.clock = pygame.time.Clock()
-    self.font = pygame.font.SysFont(None, 36)
-    self.small_font = pygame.font.SysFont(None, 24)
-    
-    # Load custom font
-    try:
-        self.custom_font = pygame.font.Font('ZenDots-Regular.ttf', 48)  # Bigger font size
-        self.small_custom_font = pygame.font.Font('ZenDots-Regular.ttf', 24)  # Smaller font for multiplier
-    except Exception as e:
-        print(f"Could not load custom font: {e}")
-        self.custom_font = self.font  # Fallback to default font
-        self.small_custom_font = self.small_font
+    # Clock driving animations, in seconds
+    self.now = now
+    self.layout = Layout(*self.screen.get_size())
+    self.load_fonts()
     
     # Initialize and play background music
     pygame.mixer.init()
@@ -38,10 +52,20 @@ class Game:
     except Exception as e:
         print(f"Could not load music: {e}")
     
-    self.grid = Grid(GRID_WIDTH, GRID_HEIGHT, GRID_OFFSET_X, GRID_OFFSET_Y)
+    load_tile_images(self.layout.cell_size)
+    self.grid = Grid(
+      self.layout.grid_width, self.layout.grid_height,
+      self.layout.grid_offset_x, self.layout.grid_offset_y,
+      self.layout.cell_size,
+      now
+    )
+    # Hands are dealt from the seed, so a game can be replayed from its moves
+    self.seed = seed if seed is not None else random.randrange(2 ** 63)
+    self.deal_count = 0
+    self.original_positions = []
     self.available_blocks = self.generate_blocks()
     self.selected_block = None
-    self.original_positions = []
+    self.history = History()
     
     self.score = 0
     self.displayed_score = 0  # For score animation
@@ -51,32 +75,80 @@ class Game:
     self.game_over = False
     self.animation_in_progress = False
     self.last_score_update = 0  # Track when the score was last updated
+    
+    # Game log, kept across restarts
+    if game_log is not None:
+        self.game_log = game_log
+    elif not hasattr(self, "game_log"):
+        self.game_log = None
+    self.game_id = time.time_ns()
+    self.move_count = 0
+    self.max_multiplier = 1
+    self.pending_moves = []  # Logged once the clears they wait on are scored
+    
+    # Background analysis of the board, kept running across restarts
+    if not hasattr(self, "analysis"):
+        self.analysis = AnalysisService()
+    self.board_version = 0
+    self.analysis_result = None
+    self.request_analysis()
+    
+    # Placement heatmap overlay, toggled with 'H'
+    self.show_heatmap = False
+    self.heatmap_key = None
+    self.heatmap_surface = None
+  
+  def load_fonts(self):
+      """Load the UI fonts at the size of the current layout."""
+      self.font = load_font(None, self.layout.scaled(36))
+      self.small_font = load_font(None, self.layout.scaled(24))
+      
+      # Load custom font
+      try:
+          self.custom_font = load_font('ZenDots-Regular.ttf', self.layout.scaled(48))  # Bigger font size
+          self.small_custom_font = load_font('ZenDots-Regular.ttf', self.layout.scaled(24))  # Smaller font for multiplier
+      except Exception as e:
+          print(f"Could not load custom font: {e}")
+          self.custom_font = self.font  # Fallback to default font
+          self.small_custom_font = self.small_font
+  
+  def resize(self, width, height):
+      """Recompute the layout after the window has been resized."""
+      layout = Layout(width, height)
+      unchanged = (layout.cell_size, layout.grid_offset_x, layout.grid_offset_y) == \
+                  (self.layout.cell_size, self.layout.grid_offset_x, self.layout.grid_offset_y)
+      self.layout = layout
+      if unchanged:
+          return
+      
+      # Swap in the tile set and fonts for the new cell size
+      load_tile_images(layout.cell_size)
+      self.load_fonts()
+      self.grid.resize(layout.grid_offset_x, layout.grid_offset_y, layout.cell_size)
+      
+      # Drop any drag in progress and move the hand to its new slots
+      if self.selected_block:
+          self.selected_block.end_drag()
+          self.selected_block = None
+      self.original_positions = [layout.hand_slot(i) for i in range(len(self.original_positions))]
+      for i, block in enumerate(self.available_blocks):
+          block.set_cell_size(layout.cell_size)
+          block.set_position(*layout.hand_slot(i))
       
   def generate_blocks(self):
       """Generate three random blocks with different types."""
       blocks: list[Block] = []
-      used_types = set()
-      
-      # Get all block types
-      block_types = list(BLOCK_TYPES.keys())
-      
-      # Generate three blocks
-      for _ in range(3):
-          # Choose a random block type that hasn't been used yet
-          available_types = [t for t in block_types if t not in used_types]
-          if not available_types:
-              available_types = block_types  # If all types have been used, use any type
-              
-          block_type = random.choice(available_types)
-          used_types.add(block_type)
-          
+      for block_type, color in deal_hand(self.seed, self.deal_count):
           # Create the block
           block = Block(block_type)
+          block.color = color
+          block.set_cell_size(self.layout.cell_size)
           
           # Position the block in the available blocks area
-          block.set_position(WINDOW_WIDTH - 320, 50 + len(blocks) * 200)
+          block.set_position(*self.layout.hand_slot(len(blocks)))
           
           blocks.append(block)
+      self.deal_count += 1
       
       # Store the original positions of the blocks
       self.original_positions = [(block.x, block.y) for block in blocks]
@@ -88,127 +160,227 @@ class Game:
       for i, block in enumerate(self.available_blocks):
           block.set_position(*self.original_positions[i])
           
-  def check_game_over(self, after_clears=False):
-      """Check if any block can be placed on the grid.
+  def snapshot(self):
+      """Capture the current board, hand and scoring state."""
+      return Snapshot(
+          cells_to_bits(self.grid.cells),
+          encode_colors(self.grid.cell_colors),
+          encode_hand(self.available_blocks),
+          self.score,
+          self.multiplier,
+          self.moves_since_clear,
+          self.move_count,
+          self.deal_count,
+          self.max_multiplier
+      )
       
-      Args:
-          after_clears: If True, simulate the board state after blocks are cleared
-      """
-      print("\nChecking game over state:")
-      print(f"Number of available blocks: {len(self.available_blocks)}")
-      
-      # Create a temporary grid to simulate the state
-      temp_grid = Grid(GRID_WIDTH, GRID_HEIGHT, GRID_OFFSET_X, GRID_OFFSET_Y)
+  def restore(self, snapshot):
+      """Restore a state captured with snapshot()."""
+      # Moves still waiting on a clear were played, so log them before going back
+      self.log_moves()
       
-      # Copy the current grid state
-      temp_grid.cells = self.grid.cells.copy()
-      temp_grid.cell_colors = self.grid.cell_colors.copy()
+      # Drop any drag or clear animation in progress
+      if self.selected_block:
+          self.selected_block.end_drag()
+          self.selected_block = None
+      self.grid.cleared_rows = []
+      self.grid.cleared_cols = []
       
-      print("Current grid state:")
-      print(temp_grid.cells)
+      self.grid.cells = bits_to_cells(snapshot.cells)
+      self.grid.cell_colors = decode_colors(snapshot.colors)
+      # A snapshot taken mid-animation still has its full lines, so clear them again
+      self.grid.check_filled_lines()
+      self.animation_in_progress = bool(self.grid.cleared_rows or self.grid.cleared_cols)
       
-      # If simulating after clears, check for rows and columns to clear
-      if after_clears:
-          # Check for filled rows and columns
-          rows_to_clear = []
-          cols_to_clear = []
+      self.available_blocks = decode_hand(snapshot.hand)
+      self.original_positions = [self.layout.hand_slot(i) for i in range(3)]
+      for i, block in enumerate(self.available_blocks):
+          block.set_cell_size(self.layout.cell_size)
+          block.set_position(*self.original_positions[i])
           
-          # Check rows
-          for row in range(GRID_SIZE):
-              if np.all(temp_grid.cells[row]):
-                  rows_to_clear.append(row)
-                  
-          # Check columns
-          for col in range(GRID_SIZE):
-              if np.all(temp_grid.cells[:, col]):
-                  cols_to_clear.append(col)
-                  
-          # Clear the rows and columns
-          for row in rows_to_clear:
-              temp_grid.cells[row] = False
-              
-          for col in cols_to_clear:
-              temp_grid.cells[:, col] = False
-              
-          print("Grid state after clears:")
-          print(temp_grid.cells)
+      self.score = snapshot.score
+      self.displayed_score = snapshot.score
+      self.multiplier = snapshot.multiplier
+      self.moves_since_clear = snapshot.moves_since_clear
+      self.move_count = snapshot.moves
+      self.deal_count = snapshot.deals
+      self.max_multiplier = snapshot.max_multiplier
+      self.game_over = False
+      self.request_analysis()
       
-      # Check if any block can be placed on the grid
-      for block in self.available_blocks:
-          print(f"\nChecking block with positions: {block.positions}")
-          # Try all possible positions on the grid
-          original_pos = (block.x, block.y)
+  def undo(self):
+      """Undo the last placement."""
+      snapshot = self.history.undo(self.snapshot())
+      if snapshot:
+          self.restore(snapshot)
           
-          can_place = False
-          for row in range(GRID_SIZE):
-              for col in range(GRID_SIZE):
-                  # Check if the block would fit within the grid boundaries
-                  max_row = max(r for r, _ in block.positions)
-                  max_col = max(c for _, c in block.positions)
-                  if row + max_row >= GRID_SIZE or col + max_col >= GRID_SIZE:
-                      continue
-                      
-                  block.set_position(
-                      self.grid.offset_x + col * CELL_SIZE,
-                      self.grid.offset_y + row * CELL_SIZE
-                  )
-                  
-                  # Check if placement is valid on the temporary grid
-                  grid_positions = block.get_grid_positions(self.grid.offset_x, self.grid.offset_y)
-                  valid = True
-                  for r, c in grid_positions:
-                      if r < 0 or r >= GRID_SIZE or c < 0 or c >= GRID_SIZE or temp_grid.cells[r][c]:
-                          valid = False
-                          break
-                          
-                  if valid:
-                      can_place = True
-                      print(f"Valid placement found at ({row}, {col})")
-                      break
-              if can_place:
-                  break
-                  
-          # Restore original position
-          block.set_position(*original_pos)
+  def redo(self):
+      """Redo the last undone placement."""
+      snapshot = self.history.redo(self.snapshot())
+      if snapshot:
+          self.restore(snapshot)
           
-          if can_place:
-              return False  # At least one block can be placed
-              
-      print("\nNo blocks can be placed - GAME OVER")
-      return True  # No block can be placed
+  def place_selected_block(self):
+      """Place the selected block where it was dropped, or send it back to the hand."""
+      block = self.selected_block
+      block.end_drag()
+
+      # Snap to grid
+      block.snap_to_grid(self.grid.offset_x, self.grid.offset_y)
+
+      if self.grid.is_valid_placement(block):
+          # Remember the state before the move so it can be undone
+          self.history.record(self.snapshot())
+          board = cells_to_bits(self.grid.cells)
+          slot = self.available_blocks.index(block)
+
+          # Place the block
+          self.grid.place_block(block)
+          # Only count lines this block completes, not ones still animating
+          lines_cleared = full_lines(cells_to_bits(self.grid.cells))[1] - full_lines(board)[1]
+
+          # Update score
+          cells_in_block = len(block.positions)
+          self.score += cells_in_block
+          self.last_score_update = int(self.now() * 1000)  # Record when score was updated
+          print(f"Score updated: {self.score} (displayed: {self.displayed_score})")
+
+          # Remove from available blocks
+          self.available_blocks.remove(block)
+
+          # Check if all blocks are placed
+          if not self.available_blocks:
+              self.available_blocks = self.generate_blocks()
+
+          # Increment moves since last clear
+          self.moves_since_clear += 1
+
+          # Reset multiplier and streak if no clear within 3 moves
+          if self.moves_since_clear > STREAK_MOVES:
+              print(f"Resetting multiplier and streak (moves since clear: {self.moves_since_clear})")
+              self.multiplier = 1
+
+          # Log the move once the clears on the board have been scored. A move
+          # placed while an earlier clear is still animating waits for it too.
+          self.pending_moves.append(dict(
+              game_id=self.game_id,
+              move_index=self.move_count,
+              slot=slot,
+              block_type=list(BLOCK_TYPES).index(block.type),
+              orientation=block.orientation_index,
+              anchor_row=(block.y - self.grid.offset_y) // self.grid.cell_size,
+              anchor_col=(block.x - self.grid.offset_x) // self.grid.cell_size,
+              lines_cleared=lines_cleared,
+              board=board,
+              score=self.score
+          ))
+          self.move_count += 1
+          if not (self.grid.cleared_rows or self.grid.cleared_cols):
+              self.log_moves()
+          
+          # Check for game over after potential clears
+          self.request_analysis()
+      else:
+          # Invalid placement, return to original position
+          idx = self.available_blocks.index(block)
+          if idx < len(self.original_positions):
+              block.set_position(*self.original_positions[idx])
+          else:
+              # Fallback if original position is not available
+              block.set_position(*self.layout.hand_slot(idx))
+
+      self.selected_block = None
+
+  def apply_clears(self, cleared_count):
+      """Score lines whose clear animation has finished."""
+      # Update score and multiplier
+      self.multiplier = next_multiplier(self.multiplier, cleared_count)
+      self.max_multiplier = max(self.max_multiplier, self.multiplier)
+      points = clear_points(cleared_count, self.multiplier)
+      self.score += points
+      self.last_score_update = int(self.now() * 1000)  # Record when score was updated
+      print(f"Score after clear: {self.score} (displayed: {self.displayed_score}, multiplier: {self.multiplier})")
+      self.moves_since_clear = 0
+      self.log_moves(points)
+      
+  def log_moves(self, clear_score=0):
+      """Write the pending moves to the game log, adding the points of the clear they waited on."""
+      if self.game_log:
+          for move in self.pending_moves:
+              self.game_log.log_move(**dict(move, multiplier=self.multiplier, score=move["score"] + clear_score))
+      self.pending_moves = []
       
+  def log_game(self):
+      """Write the game to the game log if it ended in a game over."""
+      if self.game_log and self.game_over:
+          death_hand = [list(BLOCK_TYPES).index(block.type) for block in self.available_blocks]
+          self.game_log.log_game(
+              game_id=self.game_id,
+              seed=self.seed,
+              score=self.score,
+              moves=self.move_count,
+              max_multiplier=self.max_multiplier,
+              death_hand=death_hand + [NO_BLOCK] * (3 - len(death_hand))
+          )
+          
+  def request_analysis(self):
+      """Send the current board and hand to the background analysis.
+      
+      The board is analysed as it will be once pending clears are applied.
+      Any analysis of an older board version is cancelled.
+      """
+      self.board_version += 1
+      self.analysis_result = None
+      board, _ = clear_lines(cells_to_bits(self.grid.cells))
+      self.analysis.submit(self.board_version, board, [block.positions for block in self.available_blocks])
+      
+  def poll_analysis(self):
+      """Pick up a finished analysis and check it for game over."""
+      result = self.analysis.poll()
+      if result is None or result is self.analysis_result or result.version != self.board_version:
+          return
+      self.analysis_result = result
+      if result.legal_moves == 0 and not self.game_over:
+          print("Game over detected!")
+          self.game_over = True
+          
   def check_potential_clears(self, block):
     """Check which rows and columns would be cleared if the block is placed."""
-    # Create a temporary grid to simulate placing the block
-    temp_grid = Grid(GRID_WIDTH, GRID_HEIGHT, GRID_OFFSET_X, GRID_OFFSET_Y)
-    
-    # Copy the current grid state
-    temp_grid.cells = self.grid.cells.copy()
-    temp_grid.cell_colors = self.grid.cell_colors.copy()
-    
-    # Place the block on the temporary grid
-    grid_positions = block.get_grid_positions(self.grid.offset_x, self.grid.offset_y)
-    for row, col in grid_positions:
-        if 0 <= row < GRID_SIZE and 0 <= col < GRID_SIZE:
-            temp_grid.cells[row][col] = True
-            temp_grid.cell_colors[row][col] = block.color
+    board = cells_to_bits(self.grid.cells)
+    for row, col in block.get_grid_positions(self.grid.offset_x, self.grid.offset_y):
+        board |= 1 << (row * GRID_SIZE + col)
+    return line_indices(board)
+  
+  def draw_heatmap(self):
+    """Draw every anchor where the selected block fits, with the lines it would clear."""
+    if not (self.show_heatmap and self.selected_block and not self.game_over):
+        return
     
-    # Check for filled rows and columns
-    potential_rows = []
-    potential_cols = []
+    # Use the live board, with any lines still animating, as that is what a
+    # drop is checked against. The overlay only changes with the board, the
+    # block or the cell size.
+    board = cells_to_bits(self.grid.cells)
+    key = (board, id(self.selected_block), self.grid.cell_size)
+    if key != self.heatmap_key:
+        fits, clears = board_heatmap(board, self.selected_block.positions)
+        # Only count lines the block completes, not ones already animating
+        clears = np.where(fits, clears - full_lines(board)[1], 0)
+        
+        cell_size = self.grid.cell_size
+        self.heatmap_surface = pygame.Surface((self.grid.width, self.grid.height), pygame.SRCALPHA)
+        for row, col in zip(*np.nonzero(fits)):
+            rect = pygame.Rect(col * cell_size, row * cell_size, cell_size, cell_size).inflate(-cell_size // 4, -cell_size // 4)
+            cleared = int(clears[row, col])
+            # Green for a plain fit, shading to yellow the more lines it clears
+            color = (min(255, 100 * cleared), 255, 0, 90 + min(120, 40 * cleared))
+            pygame.draw.rect(self.heatmap_surface, color, rect, border_radius=cell_size // 8)
+            if cleared:
+                text = self.small_font.render(str(cleared), True, BLACK)
+                self.heatmap_surface.blit(text, text.get_rect(center=rect.center))
+        self.heatmap_key = key
+        
+    self.screen.blit(self.heatmap_surface, (self.grid.offset_x, self.grid.offset_y))
     
-    # Check rows
-    for row in range(GRID_SIZE):
-        if np.all(temp_grid.cells[row]):
-            potential_rows.append(row)
-            
-    # Check columns
-    for col in range(GRID_SIZE):
-        if np.all(temp_grid.cells[:, col]):
-            potential_cols.append(col)
-            
-    return potential_rows, potential_cols
-  
   def draw_ghost_preview(self):
     """Draw a ghost preview of where the block would be placed."""
     if self.selected_block and not self.game_over:
@@ -216,8 +388,8 @@ class Game:
         original_x, original_y = self.selected_block.x, self.selected_block.y
         
         # Snap to grid for preview
-        grid_x = ((self.selected_block.x - self.grid.offset_x) // CELL_SIZE) * CELL_SIZE + self.grid.offset_x
-        grid_y = ((self.selected_block.y - self.grid.offset_y) // CELL_SIZE) * CELL_SIZE + self.grid.offset_y
+        grid_x = ((self.selected_block.x - self.grid.offset_x) // self.grid.cell_size) * self.grid.cell_size + self.grid.offset_x
+        grid_y = ((self.selected_block.y - self.grid.offset_y) // self.grid.cell_size) * self.grid.cell_size + self.grid.offset_y
         self.selected_block.set_position(grid_x, grid_y)
         
         # Draw ghost if placement is valid
@@ -230,7 +402,7 @@ class Game:
             self.selected_block.draw(self.screen, ghost=True)
             
             # Calculate pulsing effect based on time
-            pulse_value = (pygame.time.get_ticks() % 1000) / 1000.0  # Value between 0 and 1
+            pulse_value = (int(self.now() * 1000) % 1000) / 1000.0  # Value between 0 and 1
             pulse_alpha = int(50 + 100 * abs(math.sin(pulse_value * math.pi)))  # Pulsing between 50 and 150
             
             # Highlight rows that would be cleared
@@ -238,22 +410,22 @@ class Game:
                 # Draw a more visible highlight with pulsing effect
                 highlight_rect = pygame.Rect(
                     self.grid.offset_x,
-                    self.grid.offset_y + row * CELL_SIZE,
-                    GRID_WIDTH,
-                    CELL_SIZE
+                    self.grid.offset_y + row * self.grid.cell_size,
+                    self.grid.width,
+                    self.grid.cell_size
                 )
                 
                 # Draw a bright border around the row
                 border_rect = pygame.Rect(
                     self.grid.offset_x - 2,
-                    self.grid.offset_y + row * CELL_SIZE - 2,
-                    GRID_WIDTH + 4,
-                    CELL_SIZE + 4
+                    self.grid.offset_y + row * self.grid.cell_size - 2,
+                    self.grid.width + 4,
+                    self.grid.cell_size + 4
                 )
                 pygame.draw.rect(self.screen, (255, 255, 0), border_rect, 2)  # Thinner border
                 
                 # Draw a semi-transparent fill with pulsing alpha
-                s = pygame.Surface((GRID_WIDTH, CELL_SIZE), pygame.SRCALPHA)
+                s = pygame.Surface((self.grid.width, self.grid.cell_size), pygame.SRCALPHA)
                 s.fill((255, 255, 0, pulse_alpha))  # Yellow highlight with pulsing alpha
                 self.screen.blit(s, highlight_rect)
                 
@@ -261,46 +433,103 @@ class Game:
             for col in potential_cols:
                 # Draw a more visible highlight with pulsing effect
                 highlight_rect = pygame.Rect(
-                    self.grid.offset_x + col * CELL_SIZE,
+                    self.grid.offset_x + col * self.grid.cell_size,
                     self.grid.offset_y,
-                    CELL_SIZE,
-                    GRID_HEIGHT
+                    self.grid.cell_size,
+                    self.grid.height
                 )
                 
                 # Draw a bright border around the column
                 border_rect = pygame.Rect(
-                    self.grid.offset_x + col * CELL_SIZE - 2,
+                    self.grid.offset_x + col * self.grid.cell_size - 2,
                     self.grid.offset_y - 2,
-                    CELL_SIZE + 4,
-                    GRID_HEIGHT + 4
+                    self.grid.cell_size + 4,
+                    self.grid.height + 4
                 )
                 pygame.draw.rect(self.screen, (255, 255, 0), border_rect, 2)  # Thinner border
                 
                 # Draw a semi-transparent fill with pulsing alpha
-                s = pygame.Surface((CELL_SIZE, GRID_HEIGHT), pygame.SRCALPHA)
+                s = pygame.Surface((self.grid.cell_size, self.grid.height), pygame.SRCALPHA)
                 s.fill((255, 255, 0, pulse_alpha))  # Yellow highlight with pulsing alpha
                 self.screen.blit(s, highlight_rect)
                 
         # Restore original position
         self.selected_block.set_position(original_x, original_y)
   
+  def update(self):
+      """Advance animations by one frame."""
+      # Update animations and check for cleared lines
+      cleared_count = self.grid.update_animation()
+      if cleared_count:
+          # Animation is complete
+          self.animation_in_progress = False
+          self.apply_clears(cleared_count)
+      elif self.grid.cleared_rows or self.grid.cleared_cols:
+          # Animation is in progress
+          self.animation_in_progress = True
+
+      # Animate score - ensure it's updated every frame
+      if self.displayed_score < self.score:
+          # Calculate the step size based on the difference and current multiplier
+          diff = self.score - self.displayed_score
+          # Scale animation speed with multiplier, minimum of 1
+          current_animation_speed = max(1, self.score_animation_speed * self.multiplier)
+          step = max(1, min(current_animation_speed, diff))
+          self.displayed_score += step
+
+          # Only print every 100ms to avoid spam
+          current_time = int(self.now() * 1000)
+          if current_time - self.last_score_update > 100:
+              print(f"Animating score: {self.displayed_score}/{self.score} (diff: {diff}, step: {step}, speed: {current_animation_speed})")
+              self.last_score_update = current_time
+
+  def draw(self):
+      """Draw the game onto the screen."""
+      self.screen.fill(GRAY)
+
+      # Draw grid
+      self.grid.draw(self.screen)
+
+      # Draw placement heatmap and ghost preview
+      self.draw_heatmap()
+      self.draw_ghost_preview()
+
+      # Draw available blocks
+      for block in self.available_blocks:
+          block.draw(self.screen)
+
+      # Draw UI elements
+      score_text = self.custom_font.render(f"{int(self.displayed_score)}", True, BLACK)
+      text_rect = score_text.get_rect(center=(self.layout.center_x, self.layout.score_y))  # Moved down to y=50
+      self.screen.blit(score_text, text_rect)
+
+      # Draw multiplier in bottom right of score
+      multiplier_text = self.small_custom_font.render(f"x{self.multiplier}", True, BLACK)
+      multiplier_rect = multiplier_text.get_rect(midleft=(text_rect.right + self.layout.scaled(10), text_rect.centery))
+      self.screen.blit(multiplier_text, multiplier_rect)
+
+      # Draw game over message
+      if self.game_over:
+          game_over_text = self.font.render("GAME OVER! Press R to restart", True, (255, 0, 0))
+          text_rect = game_over_text.get_rect(center=(self.layout.center_x, self.layout.message_y))
+          self.screen.blit(game_over_text, text_rect)
+
   def run(self):
       """Run the game loop."""
       running = True
       
       while running:
-          # Check for game over at the beginning of each loop
-          if not self.game_over and not self.animation_in_progress:
-              print("Checking for game over...")
-              if self.check_game_over():
-                  print("Game over detected!")
-                  self.game_over = True
+          # Check the latest background analysis for game over
+          self.poll_analysis()
               
           # Handle events
           for event in pygame.event.get():
               if event.type == pygame.QUIT:
                   running = False
                   
+              if event.type == pygame.VIDEORESIZE:
+                  self.resize(event.w, event.h)
+                  
               if not self.game_over:
                   if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                       # Check if a block was clicked
@@ -320,126 +549,32 @@ class Game:
                   elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
                       # Place the block if it's a valid position
                       if self.selected_block and self.selected_block.dragging:
-                          self.selected_block.end_drag()
-                          
-                          # Snap to grid
-                          self.selected_block.snap_to_grid(self.grid.offset_x, self.grid.offset_y)
-                          
-                          if self.grid.is_valid_placement(self.selected_block):
-                              # Place the block
-                              self.grid.place_block(self.selected_block)
-                              
-                              # Update score
-                              cells_in_block = len(self.selected_block.positions)
-                              self.score += cells_in_block
-                              self.last_score_update = pygame.time.get_ticks()  # Record when score was updated
-                              print(f"Score updated: {self.score} (displayed: {self.displayed_score})")
-                              
-                              # Remove from available blocks
-                              self.available_blocks.remove(self.selected_block)
-                              
-                              # Check if all blocks are placed
-                              if not self.available_blocks:
-                                  self.available_blocks = self.generate_blocks()
-                                  
-                              # Increment moves since last clear
-                              self.moves_since_clear += 1
-                              
-                              # Reset multiplier and streak if no clear within 3 moves
-                              if self.moves_since_clear > 3:
-                                  print(f"Resetting multiplier and streak (moves since clear: {self.moves_since_clear})")
-                                  self.multiplier = 1
-                              
-                              # Check for game over after potential clears
-                              if self.check_game_over(after_clears=True):
-                                  self.game_over = True
-                          else:
-                              # Invalid placement, return to original position
-                              idx = self.available_blocks.index(self.selected_block)
-                              if idx < len(self.original_positions):
-                                  self.selected_block.set_position(*self.original_positions[idx])
-                              else:
-                                  # Fallback if original position is not available
-                                  self.selected_block.set_position(WINDOW_WIDTH - 320, 50 + idx * 200)
-                              
-                          self.selected_block = None
+                          self.place_selected_block()
               
               # Restart game on 'R' key press
               if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                  self.log_game()
                   self.__init__()
                   
-          # Update animations and check for cleared lines
-          cleared_count = self.grid.update_animation()
-          if cleared_count:
-              # Animation is complete
-              self.animation_in_progress = False
-              
-              # Update score and multiplier
-              if self.multiplier == 1:
-                  # Starting a new streak
-                  self.multiplier = cleared_count + 1
-              else:
-                  # Continue the streak
-                  self.multiplier += cleared_count
+              # Toggle the placement heatmap on 'H' key press
+              if event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+                  self.show_heatmap = not self.show_heatmap
                   
-              self.score += (cleared_count ** 2) * self.multiplier * 10
-              self.last_score_update = pygame.time.get_ticks()  # Record when score was updated
-              print(f"Score after clear: {self.score} (displayed: {self.displayed_score}, multiplier: {self.multiplier})")
-              self.moves_since_clear = 0
-              
-              # Check for game over after blocks are cleared
-              if self.check_game_over():
-                  self.game_over = True
-          elif self.grid.cleared_rows or self.grid.cleared_cols:
-              # Animation is in progress
-              self.animation_in_progress = True
-              
-          # Animate score - ensure it's updated every frame
-          if self.displayed_score < self.score:
-              # Calculate the step size based on the difference and current multiplier
-              diff = self.score - self.displayed_score
-              # Scale animation speed with multiplier, minimum of 1
-              current_animation_speed = max(1, self.score_animation_speed * self.multiplier)
-              step = max(1, min(current_animation_speed, diff))
-              self.displayed_score += step
-              
-              # Only print every 100ms to avoid spam
-              current_time = pygame.time.get_ticks()
-              if current_time - self.last_score_update > 100:
-                  print(f"Animating score: {self.displayed_score}/{self.score} (diff: {diff}, step: {step}, speed: {current_animation_speed})")
-                  self.last_score_update = current_time
-              
-          # Drawing
-          self.screen.fill(GRAY)
-          
-          # Draw grid
-          self.grid.draw(self.screen)
-          
-          # Draw ghost preview
-          self.draw_ghost_preview()
-          
-          # Draw available blocks
-          for block in self.available_blocks:
-              block.draw(self.screen)
-              
-          # Draw UI elements
-          score_text = self.custom_font.render(f"{int(self.displayed_score)}", True, BLACK)
-          text_rect = score_text.get_rect(center=(WINDOW_WIDTH // 2, 50))  # Moved down to y=50
-          self.screen.blit(score_text, text_rect)
-          
-          # Draw multiplier in bottom right of score
-          multiplier_text = self.small_custom_font.render(f"x{self.multiplier}", True, BLACK)
-          multiplier_rect = multiplier_text.get_rect(midleft=(text_rect.right + 10, text_rect.centery))
-          self.screen.blit(multiplier_text, multiplier_rect)
-          
-          # Draw game over message
-          if self.game_over:
-              game_over_text = self.font.render("GAME OVER! Press R to restart", True, (255, 0, 0))
-              text_rect = game_over_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 50))
-              self.screen.blit(game_over_text, text_rect)
-              
+              # Undo on Ctrl+Z, redo on Ctrl+Y or Ctrl+Shift+Z
+              if event.type == pygame.KEYDOWN and event.mod & (pygame.KMOD_CTRL | pygame.KMOD_META):
+                  if event.key == pygame.K_z and event.mod & pygame.KMOD_SHIFT or event.key == pygame.K_y:
+                      self.redo()
+                  elif event.key == pygame.K_z:
+                      self.undo()
+                  
+          self.update()
+          self.draw()
           pygame.display.flip()
           self.clock.tick(60)
           
+      self.log_game()
+      if self.game_log:
+          self.game_log.close()
+      self.analysis.stop()
       pygame.quit()
       sys.exit()
\ No newline at end of file
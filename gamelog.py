@@ -0,0 +1,94 @@
+import glob
+import os
+import time
+
+import numpy as np
+
+from constants import LOG_CHUNK_SIZE
+
+# Marks an empty hand slot in death_hand
+NO_BLOCK = 255
+
+# One record per placed block
+MOVE_DTYPE = np.dtype([
+  ("game_id", "<u8"),
+  ("move_index", "<u4"),      # Number of moves made before this one
+  ("slot", "u1"),             # Index of the block in the hand
+  ("block_type", "u1"),       # Index into BLOCK_TYPES
+  ("orientation", "u1"),
+  ("anchor_row", "u1"),       # Grid cell of the block's top-left corner
+  ("anchor_col", "u1"),
+  ("lines_cleared", "u1"),    # Lines completed by this move
+  ("multiplier", "<u2"),      # Multiplier after the move's clears
+  ("score", "<i8"),           # Score after the move's clears
+  ("board", "<u8"),           # Bitboard before the move
+])
+
+# One record per finished game
+GAME_DTYPE = np.dtype([
+  ("game_id", "<u8"),
+  ("seed", "<u8"),            # Seed the game's hands were dealt from
+  ("score", "<i8"),
+  ("moves", "<u4"),
+  ("max_multiplier", "<u2"),
+  ("death_hand", "u1", (3,)),  # Block types left in the hand, NO_BLOCK for empty slots
+])
+
+def chunk_paths(directory, kind):
+  """List the chunk files of one kind ("moves" or "games") in order."""
+  return sorted(glob.glob(os.path.join(directory, f"{kind}-*.npy")))
+
+class ChunkWriter:
+  """Buffers records of one dtype and writes them out as numbered .npy chunks."""
+  def __init__(self, directory, kind, dtype, chunk_size=LOG_CHUNK_SIZE):
+    self.directory = directory
+    self.kind = kind
+    self.buffer = np.zeros(chunk_size, dtype=dtype)
+    self.count = 0
+    # Name chunks by start time and process as well as number, so any number
+    # of writers can share a directory without overwriting each other's chunks
+    self.writer_id = f"{time.time_ns()}-{os.getpid()}"
+    self.chunk_index = 0
+
+  def append(self, **fields):
+    """Add one record, writing the chunk out once it is full."""
+    record = self.buffer[self.count]
+    for name, value in fields.items():
+      record[name] = value
+    self.count += 1
+    if self.count == len(self.buffer):
+      self.flush()
+
+  def flush(self):
+    """Write the buffered records out as a new chunk."""
+    if not self.count:
+      return
+    path = os.path.join(self.directory, f"{self.kind}-{self.writer_id}-{self.chunk_index:06d}.npy")
+    # Write to a temporary file first so readers never see a partial chunk
+    with open(path + ".tmp", "wb") as f:
+      np.save(f, self.buffer[:self.count])
+    os.replace(path + ".tmp", path)
+    self.chunk_index += 1
+    self.count = 0
+
+class GameLog:
+  """Appends finished games, and optionally every move, to chunked .npy files."""
+  def __init__(self, directory, log_moves=False, chunk_size=LOG_CHUNK_SIZE):
+    os.makedirs(directory, exist_ok=True)
+    self.games = ChunkWriter(directory, "games", GAME_DTYPE, chunk_size)
+    self.moves = ChunkWriter(directory, "moves", MOVE_DTYPE, chunk_size) if log_moves else None
+
+  def log_move(self, **fields):
+    """Record one move (ignored unless moves are being logged)."""
+    if self.moves:
+      self.moves.append(**fields)
+
+  def log_game(self, **fields):
+    """Record one finished game."""
+    self.games.append(**fields)
+
+  def close(self):
+    """Write out everything still buffered."""
+    self.games.flush()
+    if self.moves:
+      self.moves.flush()
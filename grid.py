@@ -2,14 +2,17 @@ import time
 import numpy as np
 import pygame
 from block import Block, TILE_IMAGES, load_tile_images
-from constants import BLACK, CELL_SIZE, DARK_GRAY, GRID_SIZE, WHITE
+from constants import BLACK, CELL_SIZE, CLEAR_ANIMATION_TIME, DARK_GRAY, GRID_SIZE, WHITE
 
 class Grid:
-  def __init__(self, width, height, offset_x, offset_y):
+  def __init__(self, width, height, offset_x, offset_y, cell_size=CELL_SIZE, now=time.time):
     self.width = width
     self.height = height
     self.offset_x = offset_x
     self.offset_y = offset_y
+    self.cell_size = cell_size
+    # Clock driving the clear animation, in seconds
+    self.now = now
     # Initialize the grid as a 2D array of zeros
     self.cells = np.zeros((GRID_SIZE, GRID_SIZE), dtype=bool)
     self.cell_colors = np.zeros((GRID_SIZE, GRID_SIZE, 3), dtype=int)
@@ -22,6 +25,14 @@ class Grid:
     if not TILE_IMAGES:
         load_tile_images()
 
+  def resize(self, offset_x, offset_y, cell_size):
+    """Move and rescale the grid on the screen."""
+    self.offset_x = offset_x
+    self.offset_y = offset_y
+    self.cell_size = cell_size
+    self.width = GRID_SIZE * cell_size
+    self.height = GRID_SIZE * cell_size
+
   def is_valid_placement(self, block: Block):
     """Check if the block can be placed at its current position."""
     grid_positions = block.get_grid_positions(self.offset_x, self.offset_y)
@@ -55,27 +66,26 @@ class Grid:
     """Check for and mark filled rows and columns."""
     # Check rows
     for row in range(GRID_SIZE):
-      if np.all(self.cells[row]):
+      if np.all(self.cells[row]) and row not in self.cleared_rows:
         self.cleared_rows.append(row)
           
-    # Check columns
+    # Check columns (lines from an earlier placement may still be animating)
     for col in range(GRID_SIZE):
-      if np.all(self.cells[:, col]):
+      if np.all(self.cells[:, col]) and col not in self.cleared_cols:
         self.cleared_cols.append(col)
           
     # If there are any cleared rows or columns, start the animation
     if self.cleared_rows or self.cleared_cols:
-      self.animation_start_time = time.time()
+      self.animation_start_time = self.now()
       
   def update_animation(self):
     """Update the clearing animation."""
     if not (self.cleared_rows or self.cleared_cols):
       return False
         
-    animation_duration = 1.0  # seconds
-    elapsed_time = time.time() - self.animation_start_time
+    elapsed_time = self.now() - self.animation_start_time
     
-    if elapsed_time > animation_duration:
+    if elapsed_time > CLEAR_ANIMATION_TIME:
       # Animation finished, clear the rows/columns
       for row in self.cleared_rows:
         self.cells[row] = False
@@ -103,25 +113,25 @@ class Grid:
       # Vertical lines
       pygame.draw.line(
         screen, WHITE,
-        (self.offset_x + i * CELL_SIZE, self.offset_y),
-        (self.offset_x + i * CELL_SIZE, self.offset_y + self.height)
+        (self.offset_x + i * self.cell_size, self.offset_y),
+        (self.offset_x + i * self.cell_size, self.offset_y + self.height)
       )
       
       # Horizontal lines
       pygame.draw.line(
         screen, WHITE,
-        (self.offset_x, self.offset_y + i * CELL_SIZE),
-        (self.offset_x + self.width, self.offset_y + i * CELL_SIZE)
+        (self.offset_x, self.offset_y + i * self.cell_size),
+        (self.offset_x + self.width, self.offset_y + i * self.cell_size)
       )
         
     # Draw placed blocks and empty cells
     for row in range(GRID_SIZE):
       for col in range(GRID_SIZE):
         rect = pygame.Rect(
-          self.offset_x + col * CELL_SIZE,
-          self.offset_y + row * CELL_SIZE,
-          CELL_SIZE,
-          CELL_SIZE
+          self.offset_x + col * self.cell_size,
+          self.offset_y + row * self.cell_size,
+          self.cell_size,
+          self.cell_size
         )
         
         # Check if this cell is in a cleared row or column
@@ -130,7 +140,7 @@ class Grid:
         if self.cells[row][col]:
           if is_clearing:
             # Draw with ripple animation if in a cleared row/column
-            elapsed_time = time.time() - self.animation_start_time
+            elapsed_time = self.now() - self.animation_start_time
             animation_progress = min(elapsed_time, 1.0)
             
             # Ripple effect
@@ -148,8 +158,8 @@ class Grid:
             
             if cell_progress < 1:
               scale = 1 - cell_progress
-              new_width = int(CELL_SIZE * scale)
-              new_height = int(CELL_SIZE * scale)
+              new_width = int(self.cell_size * scale)
+              new_height = int(self.cell_size * scale)
               new_rect = pygame.Rect(
                 center_x - new_width // 2,
                 center_y - new_height // 2,
@@ -0,0 +1,114 @@
+from collections import OrderedDict
+from functools import lru_cache
+
+from block import rotate_block
+from constants import ANALYSIS_CACHE_SIZE, GRID_SIZE
+
+# Every block type's orientations are the 4 rotations from rotate_block, so
+# the rules are symmetric under rotating the board by 90 degrees. Positions
+# that are rotations of each other share one canonical key, with the hand's
+# shapes rotated along with the board.
+
+def _rotation_table(row):
+  """Map each value of a row's cells to their bits after a quarter turn, (r, c) -> (c, GRID_SIZE - 1 - r)."""
+  return [
+    sum(1 << (col * GRID_SIZE + GRID_SIZE - 1 - row) for col in range(GRID_SIZE) if value >> col & 1)
+    for value in range(1 << GRID_SIZE)
+  ]
+
+_ROTATION_TABLES = [_rotation_table(row) for row in range(GRID_SIZE)]
+_ROW_MASK = (1 << GRID_SIZE) - 1
+
+def rotate_bits(bits):
+  """Rotate a bitboard a quarter turn, the same way rotate_block turns a block."""
+  rotated = 0
+  for table in _ROTATION_TABLES:
+    rotated |= table[bits & _ROW_MASK]
+    bits >>= GRID_SIZE
+  return rotated
+
+def board_rotations(bits):
+  """Get a bitboard rotated 0, 1, 2 and 3 quarter turns."""
+  rotations = [bits]
+  for _ in range(3):
+    rotations.append(rotate_bits(rotations[-1]))
+  return rotations
+
+@lru_cache(maxsize=None)
+def shape_rotations(positions):
+  """Get (mask, height, width) of a shape rotated 0, 1, 2 and 3 quarter turns."""
+  rotations = []
+  for times in range(4):
+    rotated = rotate_block(list(positions), times)
+    rotations.append((
+      sum(1 << (row * GRID_SIZE + col) for row, col in rotated),
+      max(row for row, _ in rotated) + 1,
+      max(col for _, col in rotated) + 1
+    ))
+  return tuple(rotations)
+
+def canonical_board(bits):
+  """Get the canonical key of a bitboard and the quarter turns that map it there.
+
+  Use this for results that depend on the board alone, or on the board and a
+  set of pieces closed under rotation (such as every dealable piece).
+  """
+  key, times = min((rotated, times) for times, rotated in enumerate(board_rotations(bits)))
+  return key, times
+
+def canonical_position(bits, hand):
+  """Get the canonical key of a board and hand and the quarter turns that map it there.
+
+  hand is a list with the positions of each block, and keeps its slot order
+  in the key so slot indices stay valid in the canonical frame.
+  """
+  shapes = [shape_rotations(tuple(positions)) for positions in hand]
+  return min(
+    ((rotated, tuple(shape[times][0] for shape in shapes)), times)
+    for times, rotated in enumerate(board_rotations(bits))
+  )
+
+def rotate_anchor(row, col, height, width, times):
+  """Rotate the anchor of a height x width block by some quarter turns.
+
+  Turning a canonical result back to the original frame takes
+  (4 - times) % 4 turns, using the canonical shape's height and width.
+  """
+  for _ in range(times % 4):
+    row, col = col, GRID_SIZE - row - height
+    height, width = width, height
+  return row, col
+
+def canonical_move(hand, times, slot, row, col):
+  """Map a (slot, row, col) move on the original board into the canonical frame."""
+  _, height, width = shape_rotations(tuple(hand[slot]))[0]
+  return (slot, *rotate_anchor(row, col, height, width, times))
+
+def uncanonical_move(hand, times, slot, row, col):
+  """Map a (slot, row, col) move found in the canonical frame back to the original board."""
+  _, height, width = shape_rotations(tuple(hand[slot]))[times]
+  return (slot, *rotate_anchor(row, col, height, width, 4 - times))
+
+class BoardCache:
+  """Bounded least-recently-used cache for results keyed by canonical positions."""
+  def __init__(self, maxsize=ANALYSIS_CACHE_SIZE):
+    self.maxsize = maxsize
+    self.entries = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+
+  def get(self, key, default=None):
+    """Look up a result, counting the hit or miss."""
+    if key in self.entries:
+      self.entries.move_to_end(key)
+      self.hits += 1
+      return self.entries[key]
+    self.misses += 1
+    return default
+
+  def put(self, key, value):
+    """Store a result, evicting the least recently used one if full."""
+    self.entries[key] = value
+    self.entries.move_to_end(key)
+    if len(self.entries) > self.maxsize:
+      self.entries.popitem(last=False)
@@ -0,0 +1,68 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from bitboard import bits_to_cells
+from block import rotate_block
+from constants import GRID_SIZE
+from hashing import BoardCache, canonical_position
+
+# Heatmaps of recently previewed positions, keyed by canonical position
+_HEATMAP_CACHE = BoardCache()
+
+def shape_mask(positions):
+  """Get a block's cells as a boolean (height, width) array."""
+  height = max(row for row, _ in positions) + 1
+  width = max(col for _, col in positions) + 1
+  mask = np.zeros((height, width), dtype=bool)
+  for row, col in positions:
+    mask[row, col] = True
+  return mask
+
+def placement_heatmap(cells, positions):
+  """Find every anchor where a block fits and how many lines each placement clears.
+  
+  cells is a (..., GRID_SIZE, GRID_SIZE) boolean array of occupied cells, so a
+  whole batch of boards can be evaluated at once. Returns (fits, clears), both
+  shaped (..., GRID_SIZE - height + 1, GRID_SIZE - width + 1) and indexed by the
+  anchor (row, col) of the block's top-left corner. clears is 0 where the block
+  does not fit.
+  """
+  cells = np.asarray(cells, dtype=bool)
+  mask = shape_mask(positions)
+  height, width = mask.shape
+  
+  # Correlate the shape with the free cells: it fits where every shape cell is free
+  free = sliding_window_view(~cells, mask.shape, axis=(-2, -1))
+  fits = np.einsum("...ijkl,kl->...ij", free.astype(np.uint8), mask.astype(np.uint8)) == mask.sum()
+  
+  # A row is full after placing if its fill plus the block's cells in it reach GRID_SIZE
+  rows = _lines_filled(cells.sum(axis=-1), mask.sum(axis=1))
+  cols = _lines_filled(cells.sum(axis=-2), mask.sum(axis=0))
+  clears = rows[..., :, None] + cols[..., None, :]
+  return fits, np.where(fits, clears, 0)
+
+def board_heatmap(bits, positions):
+  """Get placement_heatmap for one bitboard, reusing it for rotations of the position."""
+  key, times = canonical_position(bits, [positions])
+  found = _HEATMAP_CACHE.get(key)
+  if found is None:
+    found = placement_heatmap(bits_to_cells(key[0]), rotate_block(list(positions), times))
+    for array in found:
+      array.flags.writeable = False
+    _HEATMAP_CACHE.put(key, found)
+  # The canonical frame is the board turned times quarter turns clockwise
+  fits, clears = found
+  return np.rot90(fits, times), np.rot90(clears, times)
+
+def _lines_filled(fill, added):
+  """Count full lines for each offset of a block's per-line cell counts.
+  
+  fill is (..., GRID_SIZE) cells already filled per line and added is the
+  block's cells per line. Returns (..., GRID_SIZE - len(added) + 1).
+  """
+  full = fill == GRID_SIZE
+  windows = sliding_window_view(fill, added.size, axis=-1)
+  # Lines covered by the block, plus lines outside it that are already full
+  covered = np.sum(windows + added == GRID_SIZE, axis=-1)
+  outside = full.sum(axis=-1)[..., None] - sliding_window_view(full, added.size, axis=-1).sum(axis=-1)
+  return covered + outside
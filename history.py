@@ -0,0 +1,103 @@
+import struct
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+
+from block import BLOCK_TYPES, COLOR_TO_IMAGE, Block
+from constants import GRID_SIZE, HISTORY_LIMIT
+
+# Colors a block can have, in a fixed order so they can be stored as small indices
+PALETTE = [color for color in COLOR_TO_IMAGE if color is not None]
+# Palette with black (empty) at index 0, for decoding cell colors
+_PALETTE_ARRAY = np.array([(0, 0, 0)] + PALETTE, dtype=int)
+_BLOCK_TYPE_NAMES = list(BLOCK_TYPES)
+# Sizes of the fixed-size parts of a packed snapshot: the counters, the bitboard and the colors
+_COUNTERS = struct.Struct("<qIIIII")
+_CELLS_SIZE = (GRID_SIZE * GRID_SIZE + 7) // 8
+_COLORS_SIZE = (GRID_SIZE * GRID_SIZE + 1) // 2
+
+class Snapshot(NamedTuple):
+  """Immutable record of everything a placement can change."""
+  cells: int               # Occupied cells as a bitboard
+  colors: bytes            # Palette index of each cell, two cells per byte
+  hand: bytes              # (block type, orientation, color) per available block
+  score: int
+  multiplier: int
+  moves_since_clear: int
+  moves: int               # Number of moves made so far
+  deals: int               # Number of hands dealt so far
+  max_multiplier: int
+
+  def pack(self):
+    """Pack the snapshot into a single bytes object, under 80 bytes of data."""
+    return _COUNTERS.pack(
+      self.score, self.multiplier, self.moves_since_clear,
+      self.moves, self.deals, self.max_multiplier
+    ) + self.cells.to_bytes(_CELLS_SIZE, "little") + self.colors + self.hand
+
+  @classmethod
+  def unpack(cls, data):
+    """Rebuild a snapshot packed with pack()."""
+    score, multiplier, moves_since_clear, moves, deals, max_multiplier = _COUNTERS.unpack_from(data)
+    cells_end = _COUNTERS.size + _CELLS_SIZE
+    colors_end = cells_end + _COLORS_SIZE
+    return cls(
+      int.from_bytes(data[_COUNTERS.size:cells_end], "little"), data[cells_end:colors_end], data[colors_end:],
+      score, multiplier, moves_since_clear, moves, deals, max_multiplier
+    )
+
+def encode_colors(cell_colors):
+  """Pack a grid of RGB colors into palette indices, 4 bits per cell."""
+  matches = np.all(cell_colors[:, :, None, :] == _PALETTE_ARRAY[None, None, 1:, :], axis=-1)
+  indices = np.where(matches.any(axis=-1), matches.argmax(axis=-1) + 1, 0).astype(np.uint8).ravel()
+  return (indices[0::2] | (indices[1::2] << 4)).tobytes()
+
+def decode_colors(data):
+  """Unpack palette indices into a grid of RGB colors."""
+  packed = np.frombuffer(data, dtype=np.uint8)
+  indices = np.empty(packed.size * 2, dtype=np.uint8)
+  indices[0::2] = packed & 0x0F
+  indices[1::2] = packed >> 4
+  return _PALETTE_ARRAY[indices].reshape(GRID_SIZE, GRID_SIZE, 3)
+
+def encode_hand(blocks):
+  """Pack the type, orientation and color of each block into bytes."""
+  data = bytearray()
+  for block in blocks:
+    data += bytes((_BLOCK_TYPE_NAMES.index(block.type), block.orientation_index, PALETTE.index(block.color)))
+  return bytes(data)
+
+def decode_hand(data):
+  """Rebuild the blocks of a hand packed with encode_hand."""
+  blocks = []
+  for i in range(0, len(data), 3):
+    block = Block(_BLOCK_TYPE_NAMES[data[i]], data[i + 1])
+    block.color = PALETTE[data[i + 2]]
+    blocks.append(block)
+  return blocks
+
+class History:
+  """Undo and redo stacks of game snapshots, kept packed into bytes."""
+  def __init__(self, limit=HISTORY_LIMIT):
+    self.undo_stack = deque(maxlen=limit)
+    self.redo_stack = []
+
+  def record(self, snapshot):
+    """Remember the state before a new move; this forgets any undone moves."""
+    self.undo_stack.append(snapshot.pack())
+    self.redo_stack.clear()
+
+  def undo(self, current):
+    """Step back one move, returning the snapshot to restore (or None)."""
+    if not self.undo_stack:
+      return None
+    self.redo_stack.append(current.pack())
+    return Snapshot.unpack(self.undo_stack.pop())
+
+  def redo(self, current):
+    """Step forward one undone move, returning the snapshot to restore (or None)."""
+    if not self.redo_stack:
+      return None
+    self.undo_stack.append(current.pack())
+    return Snapshot.unpack(self.redo_stack.pop())
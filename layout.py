@@ -0,0 +1,38 @@
+from constants import CELL_SIZE, GRID_OFFSET_X, GRID_OFFSET_Y, GRID_SIZE, MIN_CELL_SIZE, WINDOW_HEIGHT, WINDOW_WIDTH
+
+class Layout:
+  """Pixel geometry of the window for a given window size.
+
+  The design-time layout in constants.py is scaled uniformly so that it fits
+  the window, and centered in whatever space is left over.
+  """
+  def __init__(self, window_width=WINDOW_WIDTH, window_height=WINDOW_HEIGHT):
+    self.window_width = window_width
+    self.window_height = window_height
+    # Snap the scale to a whole cell size so tiles line up with grid lines
+    scale = min(window_width / WINDOW_WIDTH, window_height / WINDOW_HEIGHT)
+    self.cell_size = max(MIN_CELL_SIZE, int(CELL_SIZE * scale))
+    self.scale = self.cell_size / CELL_SIZE
+    # Margins that center the scaled content in the window
+    self.margin_x = max(0, (window_width - self.scaled(WINDOW_WIDTH)) // 2)
+    self.margin_y = max(0, (window_height - self.scaled(WINDOW_HEIGHT)) // 2)
+    # Grid geometry
+    self.grid_width = GRID_SIZE * self.cell_size
+    self.grid_height = GRID_SIZE * self.cell_size
+    self.grid_offset_x = self.margin_x + self.scaled(GRID_OFFSET_X)
+    self.grid_offset_y = self.margin_y + self.scaled(GRID_OFFSET_Y)
+    # UI anchors
+    self.center_x = window_width // 2
+    self.score_y = self.margin_y + self.scaled(50)
+    self.message_y = self.margin_y + self.scaled(WINDOW_HEIGHT - 50)
+
+  def scaled(self, pixels):
+    """Scale a design-time pixel length to this layout."""
+    return int(round(pixels * self.scale))
+
+  def hand_slot(self, index):
+    """Get the screen position of the given slot in the hand area."""
+    return (
+      self.margin_x + self.scaled(WINDOW_WIDTH - 320),
+      self.margin_y + self.scaled(50 + index * 200)
+    )
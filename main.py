@@ -1,8 +1,21 @@
+import argparse
+import os
+
+# Render at the monitor's real resolution on HiDPI displays instead of
+# letting the OS upscale the window
+os.environ.setdefault("SDL_WINDOWS_DPI_AWARENESS", "permonitorv2")
+
 import pygame
 
 from game import Game
+from gamelog import GameLog
+
+parser = argparse.ArgumentParser(description="Play Block Blast.")
+parser.add_argument("--log-dir", help="append finished games to chunked .npy logs in this directory")
+parser.add_argument("--log-moves", action="store_true", help="also log every move (requires --log-dir)")
+args = parser.parse_args()
 
 pygame.init()
 
-game = Game()
+game = Game(GameLog(args.log_dir, args.log_moves) if args.log_dir else None)
 game.run()
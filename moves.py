@@ -0,0 +1,55 @@
+import heapq
+from typing import NamedTuple
+
+from bitboard import anchor_masks, clear_lines
+
+class Move(NamedTuple):
+  """A legal placement of one block from the hand."""
+  slot: int                # Index of the block in the hand
+  orientation: int         # Orientation index of the block
+  row: int                 # Grid cell of the block's top-left corner
+  col: int
+  clears: int              # Lines cleared by the placement
+  board: int               # Bitboard after placing the block and clearing lines
+
+def legal_moves(board, hand, orientations=None, order=None):
+  """Yield the legal moves for a hand one at a time.
+
+  board is a bitboard and hand a list with the positions of each block (as in
+  Block.positions), with their orientation indices in orientations. Without
+  an order, moves are produced lazily in slot, row, col order, so a consumer
+  that stops early (e.g. after the first legal move) skips the rest of the
+  work. With an order, every legal move is generated first and then handed
+  out lowest key first, e.g. order=most_clears.
+  """
+  moves = _generate(board, hand, orientations or [0] * len(hand))
+  if order is None:
+    yield from moves
+    return
+  # Heap on (key, generation index) so ties keep generation order
+  heap = [(order(move), index, move) for index, move in enumerate(moves)]
+  heapq.heapify(heap)
+  while heap:
+    yield heapq.heappop(heap)[2]
+
+def _generate(board, hand, orientations):
+  """Yield legal moves in slot, row, col order."""
+  for slot, positions in enumerate(hand):
+    for row, col, mask in anchor_masks(tuple(positions)):
+      if board & mask:
+        continue
+      after, clears = clear_lines(board | mask)
+      yield Move(slot, orientations[slot], row, col, clears, after)
+
+def has_legal_move(board, hand):
+  """Check whether any block of the hand fits on the board."""
+  return next(legal_moves(board, hand), None) is not None
+
+# Ordering heuristics for legal_moves
+def most_clears(move):
+  """Order moves by lines cleared, most first."""
+  return -move.clears
+
+def lowest_fill(move):
+  """Order moves by occupied cells left after the move, fewest first."""
+  return bin(move.board).count("1")
@@ -0,0 +1,58 @@
+import importlib
+from abc import ABC, abstractmethod
+
+from moves import legal_moves, lowest_fill, most_clears
+
+class Policy(ABC):
+  """Chooses moves in headless games.
+
+  Subclass this and implement choose() to plug a strategy into the tournament
+  (see tournament.py, which accepts "module:ClassName" for custom policies).
+  """
+  name = "policy"
+
+  @abstractmethod
+  def choose(self, board, hand, rng):
+    """Choose a move, returning (slot, row, col).
+
+    board is a bitboard of occupied cells and hand is a list with the
+    positions of each available block (as in Block.positions), indexed by slot.
+    rng is a random.Random seeded per game, for policies that need randomness.
+    Only called when at least one legal move exists.
+    """
+
+class RandomPolicy(Policy):
+  """Picks a legal move uniformly at random."""
+  name = "random"
+
+  def choose(self, board, hand, rng):
+    move = rng.choice(list(legal_moves(board, hand)))
+    return move.slot, move.row, move.col
+
+class GreedyClearsPolicy(Policy):
+  """Picks the move that clears the most lines."""
+  name = "greedy"
+
+  def choose(self, board, hand, rng):
+    move = next(legal_moves(board, hand, order=most_clears))
+    return move.slot, move.row, move.col
+
+class LowestFillPolicy(Policy):
+  """Picks the move that leaves the fewest occupied cells after clears."""
+  name = "lowest-fill"
+
+  def choose(self, board, hand, rng):
+    move = next(legal_moves(board, hand, order=lowest_fill))
+    return move.slot, move.row, move.col
+
+# Built-in policies by name
+POLICIES = {policy.name: policy for policy in (RandomPolicy, GreedyClearsPolicy, LowestFillPolicy)}
+
+def load_policy(spec):
+  """Create a policy from a built-in name or a "module:ClassName" spec."""
+  if spec in POLICIES:
+    return POLICIES[spec]()
+  module_name, _, class_name = spec.partition(":")
+  if not class_name:
+    raise ValueError(f"Unknown policy '{spec}' (built-in: {', '.join(POLICIES)})")
+  return getattr(importlib.import_module(module_name), class_name)()
@@ -0,0 +1,183 @@
+"""Render a logged game offscreen, faster than real time.
+
+The game is replayed from its seed and logged moves (see main.py --log-moves)
+with a simulated clock, and every frame is written out either as PNG files
+or as a raw RGB stream (much faster, as no PNG encoding is needed):
+
+    python render.py logs --out frames
+    python render.py logs --raw | ffmpeg -f rawvideo -pix_fmt rgb24 -s 880x680 -r 60 -i - replay.mp4
+"""
+import argparse
+import os
+import sys
+import time
+
+# Render without opening a window or an audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+from analytics import stream
+from bitboard import full_lines
+from constants import CLEAR_ANIMATION_TIME, WINDOW_HEIGHT, WINDOW_WIDTH
+from game import Game
+
+class SimulatedClock:
+  """A clock that only moves when told to, for rendering animations frame by frame."""
+  def __init__(self):
+    self.time = 0.0
+
+  def __call__(self):
+    return self.time
+
+  def advance(self, seconds):
+    self.time += seconds
+
+def load_replay(directory, game_id=None):
+  """Find a logged game's seed and moves, in the order they were logged.
+
+  Defaults to the highest scoring game that has its moves logged.
+  """
+  logged_games = set()
+  for batch in stream(directory, "moves"):
+    logged_games.update(np.unique(batch["game_id"]).tolist())
+
+  best = None
+  for batch in stream(directory, "games"):
+    candidates = batch[np.isin(batch["game_id"], list(logged_games))]
+    if game_id is not None:
+      candidates = candidates[candidates["game_id"] == game_id]
+    if len(candidates):
+      top = candidates[np.argmax(candidates["score"])]
+      if best is None or top["score"] > best[0]:
+        best = (int(top["score"]), int(top["game_id"]), int(top["seed"]))
+  if best is None:
+    raise SystemExit("No logged game with moves found")
+  _, chosen_id, seed = best
+
+  moves = [batch[batch["game_id"] == chosen_id] for batch in stream(directory, "moves")]
+  return chosen_id, seed, np.concatenate(moves)
+
+class ReplayRenderer:
+  """Plays logged moves through a Game and writes out every frame."""
+  def __init__(self, game, clock, write_frame, fps=60, move_time=0.4):
+    self.game = game
+    self.clock = clock
+    self.write_frame = write_frame
+    self.fps = fps
+    self.move_time = move_time
+    self.frames = 0
+
+  def frame(self):
+    """Advance the game by one frame and write it out."""
+    self.clock.advance(1 / self.fps)
+    self.game.poll_analysis()
+    self.game.update()
+    self.game.draw()
+    self.write_frame(self.game.screen, self.frames)
+    self.frames += 1
+
+  def hold(self, seconds):
+    """Write out frames for a stretch of simulated time."""
+    for _ in range(round(seconds * self.fps)):
+      self.frame()
+
+  def play_move(self, slot, row, col, move_time=None):
+    """Drag a block from the hand onto the grid and drop it."""
+    game = self.game
+    if slot >= len(game.available_blocks):
+      raise ValueError(f"Logged move {(slot, row, col)} has no block in slot {slot} of the replayed hand")
+    block = game.available_blocks[slot]
+    start_x, start_y = block.x, block.y
+    end_x = game.grid.offset_x + col * game.grid.cell_size
+    end_y = game.grid.offset_y + row * game.grid.cell_size
+
+    game.selected_block = block
+    block.start_drag(start_x, start_y)
+    steps = max(1, round((move_time or self.move_time) * self.fps))
+    for step in range(1, steps + 1):
+      # Ease out so the block settles onto its target
+      t = 1 - (1 - step / steps) ** 2
+      block.update_drag(start_x + (end_x - start_x) * t, start_y + (end_y - start_y) * t)
+      self.frame()
+    moves_before = game.move_count
+    game.place_selected_block()
+    if game.move_count == moves_before:
+      raise ValueError(f"Logged move {(slot, row, col)} does not fit the replayed board")
+
+  def play(self, moves):
+    """Replay logged moves, following any undos and redos in the log.
+    
+    Each logged board still holds any lines that were animating when the
+    move was made, so a move dropped during a clear animation is replayed
+    during the animation too, and its clear is scored along with it.
+    """
+    game = self.game
+    # Drag fast enough that a move made mid-clear lands before the clear finishes
+    quick_move_time = min(self.move_time, CLEAR_ANIMATION_TIME / 2)
+    for index, move in enumerate(moves):
+      while game.move_count > move["move_index"] and game.history.undo_stack:
+        game.undo()
+      while game.move_count < move["move_index"] and game.history.redo_stack:
+        game.redo()
+      mid_clear = bool(full_lines(int(move["board"]))[1])
+      self.play_move(int(move["slot"]), int(move["anchor_row"]), int(move["anchor_col"]),
+                     quick_move_time if mid_clear else self.move_time)
+      if index + 1 < len(moves) and full_lines(int(moves[index + 1]["board"]))[1]:
+        # The next move was made before this clear finished
+        continue
+      # Let the clear animation finish before the next move
+      while game.grid.cleared_rows or game.grid.cleared_cols:
+        self.frame()
+      self.hold(self.move_time / 2)
+
+    # Wait for the final game over check so the last frames show it
+    while game.analysis.poll() is None:
+      time.sleep(0.001)
+    self.hold(2)
+
+def main():
+  parser = argparse.ArgumentParser(description="Render a logged Block Blast game offscreen.")
+  parser.add_argument("log_dir", help="directory the game logs were written to")
+  parser.add_argument("--game-id", type=int, help="game to render (default: highest scoring game with moves)")
+  parser.add_argument("--out", help="directory to write a PNG sequence to")
+  parser.add_argument("--raw", action="store_true", help="write raw RGB24 frames to stdout instead")
+  parser.add_argument("--size", default=f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}", help="frame size, e.g. 1920x1080")
+  parser.add_argument("--fps", type=int, default=60)
+  parser.add_argument("--move-time", type=float, default=0.4, help="seconds spent dragging each block")
+  args = parser.parse_args()
+  if bool(args.out) == args.raw:
+    parser.error("give exactly one of --out or --raw")
+
+  game_id, seed, moves = load_replay(args.log_dir, args.game_id)
+
+  if args.raw:
+    # Keep the game's log output out of the frame stream
+    output = sys.stdout.buffer
+    sys.stdout = sys.stderr
+    def write_frame(surface, index):
+      output.write(pygame.image.tostring(surface, "RGB"))
+  else:
+    os.makedirs(args.out, exist_ok=True)
+    def write_frame(surface, index):
+      pygame.image.save(surface, os.path.join(args.out, f"frame-{index:06d}.png"))
+
+  pygame.init()
+  width, height = (int(n) for n in args.size.split("x"))
+  pygame.display.set_mode((width, height))
+
+  clock = SimulatedClock()
+  game = Game(seed=seed, now=clock)
+  renderer = ReplayRenderer(game, clock, write_frame, args.fps, args.move_time)
+  started = time.perf_counter()
+  renderer.play(moves)
+  elapsed = time.perf_counter() - started
+  game.analysis.stop()
+  print(f"Rendered game {game_id}: {len(moves)} moves, {renderer.frames} frames "
+        f"({renderer.frames / args.fps:.1f}s of video in {elapsed:.1f}s)", file=sys.stderr)
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,16 @@
+# Scoring rules shared by the game and headless simulations
+
+# A streak is kept if a line is cleared within this many moves of the last clear
+STREAK_MOVES = 3
+
+def next_multiplier(multiplier, cleared_count):
+  """Get the multiplier after clearing lines."""
+  if multiplier == 1:
+    # Starting a new streak
+    return cleared_count + 1
+  # Continue the streak
+  return multiplier + cleared_count
+
+def clear_points(cleared_count, multiplier):
+  """Get the points scored for clearing lines at the given multiplier."""
+  return (cleared_count ** 2) * multiplier * 10
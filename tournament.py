@@ -0,0 +1,168 @@
+"""Play policies against each other on identical seeded deals.
+
+Every policy plays the same seeds, in rounds spread over worker processes.
+After each round the policies are ranked by mean score, and play stops once
+every neighbouring pair in the ranking is separated by a confidence interval
+on their score difference over the shared seeds. As the pairs are tested
+again after every round, each test uses a Bonferroni-corrected level so the
+chance of any false separation stays under 5% across the whole tournament:
+
+    python tournament.py random greedy lowest-fill
+    python tournament.py greedy mymodule:MyPolicy --max-games 20000
+"""
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+from bitboard import anchor_masks, clear_lines
+from block import BLOCK_TYPES, deal_hand, rotate_block
+from moves import has_legal_move
+from policy import load_policy
+from rules import STREAK_MOVES, clear_points, next_multiplier
+
+# z value for two-sided 95% confidence intervals
+Z_95 = 1.96
+# Chance of falsely separating any pair over a whole tournament
+FAMILY_ALPHA = 0.05
+
+def play_game(policy, seed, max_moves=None):
+  """Play one headless game with the same rules as Game, returning the final score."""
+  rng = random.Random(seed)
+  board = 0
+  score = 0
+  multiplier = 1
+  moves_since_clear = 0
+  deal_count = 0
+  moves = 0
+  hand = []
+  while max_moves is None or moves < max_moves:
+    if not hand:
+      hand = [tuple(rotate_block(BLOCK_TYPES[block_type], 0)) for block_type, _ in deal_hand(seed, deal_count)]
+      deal_count += 1
+    # Game over when no block in the hand fits anywhere
+    if not has_legal_move(board, hand):
+      break
+
+    slot, row, col = policy.choose(board, hand, rng)
+    positions = hand.pop(slot)
+    mask = next(mask for r, c, mask in anchor_masks(positions) if (r, c) == (row, col))
+    if board & mask:
+      raise ValueError(f"{policy.name} chose an illegal move {(slot, row, col)}")
+    board |= mask
+    score += len(positions)
+    moves += 1
+
+    # Reset multiplier and streak if no clear within STREAK_MOVES moves
+    moves_since_clear += 1
+    if moves_since_clear > STREAK_MOVES:
+      multiplier = 1
+    board, cleared_count = clear_lines(board)
+    if cleared_count:
+      multiplier = next_multiplier(multiplier, cleared_count)
+      score += clear_points(cleared_count, multiplier)
+      moves_since_clear = 0
+  return score
+
+def play_batch(spec, seeds, max_moves):
+  """Play one policy on a batch of seeds (runs in a worker process)."""
+  policy = load_policy(spec)
+  return [play_game(policy, seed, max_moves) for seed in seeds]
+
+def mean_interval(scores, z=Z_95):
+  """Get the mean and the half-width of its confidence interval (95% by default)."""
+  if len(scores) < 2:
+    return float(np.mean(scores)), math.inf
+  return float(np.mean(scores)), z * float(np.std(scores, ddof=1)) / math.sqrt(len(scores))
+
+def median_interval(scores):
+  """Get the median and a distribution-free 95% confidence interval for it."""
+  ordered = np.sort(scores)
+  n = len(ordered)
+  spread = Z_95 * math.sqrt(n) / 2
+  low = max(0, math.floor(n / 2 - spread) - 1)
+  high = min(n - 1, math.ceil(n / 2 + spread))
+  return float(np.median(ordered)), float(ordered[low]), float(ordered[high])
+
+def test_alpha(num_policies, round_size, min_games, max_games):
+  """Get the level for each pair test, splitting FAMILY_ALPHA over every test the tournament may run."""
+  first_look = max(1, math.ceil(min_games / round_size))
+  last_look = max(first_look, math.ceil(max_games / round_size))
+  tests = (last_look - first_look + 1) * max(1, num_policies - 1)
+  return FAMILY_ALPHA / tests
+
+def separated(ranking, scores, z=Z_95):
+  """Check whether each neighbouring pair in the ranking differs significantly."""
+  for better, worse in zip(ranking, ranking[1:]):
+    mean, half_width = mean_interval(scores[better] - scores[worse], z)
+    if abs(mean) <= half_width:
+      return False
+  return True
+
+def run_tournament(specs, seed, round_size, min_games, max_games, max_moves, workers):
+  """Play rounds of matched seeds until the ranking separates, returning scores per policy."""
+  # Load each policy here first, so a broken one fails before any worker starts
+  for spec in specs:
+    load_policy(spec)
+  alpha = test_alpha(len(specs), round_size, min_games, max_games)
+  z = NormalDist().inv_cdf(1 - alpha / 2)
+  print(f"Testing each pair at the {100 * (1 - alpha):.4g}% level (z = {z:.2f}), "
+        f"{100 * (1 - FAMILY_ALPHA):.0f}% over the whole tournament")
+  seeds_rng = random.Random(seed)
+  scores = {spec: np.zeros(0, dtype=np.int64) for spec in specs}
+  batch_size = max(1, round_size // (workers * 4))
+  with ProcessPoolExecutor(workers) as pool:
+    while True:
+      seeds = [seeds_rng.randrange(2 ** 63) for _ in range(round_size)]
+      batches = [seeds[i:i + batch_size] for i in range(0, len(seeds), batch_size)]
+      futures = {
+        spec: [pool.submit(play_batch, spec, batch, max_moves) for batch in batches]
+        for spec in specs
+      }
+      for spec in specs:
+        results = [score for future in futures[spec] for score in future.result()]
+        scores[spec] = np.concatenate([scores[spec], results])
+
+      games = len(scores[specs[0]])
+      ranking = sorted(specs, key=lambda spec: -scores[spec].mean())
+      if games >= min_games and separated(ranking, scores, z):
+        print(f"Rankings separated after {games} games per policy")
+        return scores
+      if games >= max_games:
+        print(f"Stopped at {games} games per policy without separating all rankings")
+        return scores
+      print(f"{games} games per policy, rankings not yet separated...")
+
+def main():
+  parser = argparse.ArgumentParser(description="Compare Block Blast policies on identical seeded deals.")
+  parser.add_argument("policies", nargs="+", help="built-in policy names or module:ClassName")
+  parser.add_argument("--seed", type=int, default=0, help="seed for the sequence of game seeds")
+  parser.add_argument("--round-size", type=int, default=200, help="games per policy between checks")
+  parser.add_argument("--min-games", type=int, default=200)
+  parser.add_argument("--max-games", type=int, default=10000)
+  parser.add_argument("--max-moves", type=int, help="end games after this many moves")
+  parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+  args = parser.parse_args()
+
+  started = time.perf_counter()
+  scores = run_tournament(args.policies, args.seed, args.round_size, args.min_games,
+                          args.max_games, args.max_moves, args.workers)
+  elapsed = time.perf_counter() - started
+
+  print(f"{'policy':<24} {'games':>6} {'mean (95% CI)':>22} {'median (95% CI)':>26}")
+  for spec in sorted(scores, key=lambda spec: -scores[spec].mean()):
+    mean, half_width = mean_interval(scores[spec])
+    median, low, high = median_interval(scores[spec])
+    print(f"{spec:<24} {len(scores[spec]):>6} {mean:>10.1f} ± {half_width:<9.1f} "
+          f"{median:>10.1f} [{low:.0f}, {high:.0f}]")
+  print(f"Finished in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+  main()